@@ -0,0 +1,60 @@
+"""Add denormalized ebook_count to collections
+
+Revision ID: 4b7e2a9c1d3f
+Revises: 95d51dcae914
+Create Date: 2026-10-16 09:12:31.418207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2a9c1d3f'
+down_revision = '95d51dcae914'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'collections',
+        sa.Column('ebook_count', sa.Integer(), server_default='0', nullable=False)
+    )
+    
+    # Backfill counts for existing collections
+    op.execute("""
+        UPDATE collections c
+        SET ebook_count = (
+            SELECT COUNT(*) FROM collection_ebooks ce WHERE ce.collection_id = c.id
+        )
+    """)
+    
+    # Keep the counter in sync with the association table
+    op.execute("""
+        CREATE OR REPLACE FUNCTION collection_ebooks_count_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE collections SET ebook_count = ebook_count + 1
+                WHERE id = NEW.collection_id;
+                RETURN NEW;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE collections SET ebook_count = ebook_count - 1
+                WHERE id = OLD.collection_id;
+                RETURN OLD;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER collection_ebooks_count
+        AFTER INSERT OR DELETE ON collection_ebooks
+        FOR EACH ROW EXECUTE FUNCTION collection_ebooks_count_trigger()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS collection_ebooks_count ON collection_ebooks")
+    op.execute("DROP FUNCTION IF EXISTS collection_ebooks_count_trigger()")
+    op.drop_column('collections', 'ebook_count')
@@ -0,0 +1,31 @@
+"""Add index on users.email
+
+Revision ID: d8e1f0b3a6c2
+Revises: 4b7e2a9c1d3f
+Create Date: 2026-10-16 14:03:52.517364
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8e1f0b3a6c2'
+down_revision = '4b7e2a9c1d3f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Build the index without locking users against writes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_users_email'), 'users', ['email'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f('ix_users_email'), table_name='users', postgresql_concurrently=True
+        )
@@ -62,14 +62,9 @@ async def supabase_auth(
         email = supabase_user_data.get("email", "no-email")
         logger.info(f"✅ Token verified! User ID: {user_id}, Provider: {provider}, Email: {email}")
         
-        # Check if user exists in our database (using Supabase UUID)
-        logger.info(f"🔍 Checking if user {user_id} exists in database...")
-        user = await user_service.get_user_by_id(db, user_id=user_id)
-        
-        if not user:
-            logger.info(f"👤 User {user_id} not found in database, creating new user...")
-            # Create new user with same UUID as Supabase
-            user = await user_service.create_user_from_supabase(db, supabase_user_data)
+        # Load the user, creating it with the Supabase UUID on first login
+        user, created = await user_service.get_or_create_user_from_supabase(db, supabase_user_data)
+        if created:
             logger.info(f"✅ Created new user: {user.username} (ID: {user.id})")
         else:
             logger.info(f"✅ Found existing user: {user.username} (ID: {user.id})")
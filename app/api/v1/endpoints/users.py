@@ -76,10 +76,10 @@ async def check_username_availability(
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     """Check if username is available."""
-    existing_user = await user_service.get_user_by_username(db, username)
-    
-    # Username is available if no user exists or it belongs to current user
-    is_available = not existing_user or existing_user.id == current_user.id
+    # Username is available if no user has it or it belongs to current user
+    is_available = not await user_service.username_exists(
+        db, username, exclude_user_id=current_user.id
+    )
     
     return {
         "username": username,
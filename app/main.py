@@ -2,18 +2,31 @@
 Main FastAPI application for the Unread backend.
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 from app.api.v1.api import api_router
 from app.core.config import settings
+from app.core.http import close_async_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup and shutdown."""
+    yield
+    # Release pooled outbound connections
+    await close_async_client()
+
 
 app = FastAPI(
     title="Unread API",
     description="Backend API for the Unread ebook sharing platform",
     version="1.0.0",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Set up CORS
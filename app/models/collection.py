@@ -7,7 +7,7 @@ import enum
 import random
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, String, ForeignKey, Table, Enum
+from sqlalchemy import DDL, Column, DateTime, Integer, String, ForeignKey, Table, Enum, event
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 
@@ -45,6 +45,60 @@ collection_ebooks = Table(
 )
 
 
+# Keep collections.ebook_count in sync with collection_ebooks. Production
+# schemas get this from Alembic; the same DDL runs on create_all so test and
+# dev databases built from the models maintain the counter too.
+event.listen(
+    collection_ebooks,
+    "after_create",
+    DDL("""
+        CREATE OR REPLACE FUNCTION collection_ebooks_count_trigger() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE collections SET ebook_count = ebook_count + 1
+                WHERE id = NEW.collection_id;
+                RETURN NEW;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE collections SET ebook_count = ebook_count - 1
+                WHERE id = OLD.collection_id;
+                RETURN OLD;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """).execute_if(dialect="postgresql"),
+)
+event.listen(
+    collection_ebooks,
+    "after_create",
+    DDL("""
+        CREATE TRIGGER collection_ebooks_count
+        AFTER INSERT OR DELETE ON collection_ebooks
+        FOR EACH ROW EXECUTE FUNCTION collection_ebooks_count_trigger()
+    """).execute_if(dialect="postgresql"),
+)
+event.listen(
+    collection_ebooks,
+    "after_create",
+    DDL("""
+        CREATE TRIGGER collection_ebooks_count_insert AFTER INSERT ON collection_ebooks
+        BEGIN
+            UPDATE collections SET ebook_count = ebook_count + 1 WHERE id = NEW.collection_id;
+        END
+    """).execute_if(dialect="sqlite"),
+)
+event.listen(
+    collection_ebooks,
+    "after_create",
+    DDL("""
+        CREATE TRIGGER collection_ebooks_count_delete AFTER DELETE ON collection_ebooks
+        BEGIN
+            UPDATE collections SET ebook_count = ebook_count - 1 WHERE id = OLD.collection_id;
+        END
+    """).execute_if(dialect="sqlite"),
+)
+
+
 class Collection(Base):
     """Simplified Collection model with privacy controls."""
     
@@ -60,6 +114,9 @@ class Collection(Base):
     # Color for frontend display
     color = Column(Enum(CollectionColor), default=CollectionColor.random_color, nullable=False)
     
+    # Denormalized count, maintained by a trigger on collection_ebooks
+    ebook_count = Column(Integer, default=0, server_default="0", nullable=False)
+    
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
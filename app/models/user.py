@@ -22,7 +22,7 @@ class User(Base):
     provider = Column(String(20), nullable=False)  # 'apple' or 'google'
     
     # User profile (from OAuth providers)
-    email = Column(String(255), nullable=True)  # May be None for Apple privacy
+    email = Column(String(255), nullable=True, index=True)  # May be None for Apple privacy; not unique across providers
     avatar_url = Column(String(500), nullable=True)
     
     # User flags
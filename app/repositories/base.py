@@ -7,7 +7,7 @@ from uuid import UUID
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.base_class import Base
@@ -64,13 +64,23 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(query)
         return result.scalar()
 
-    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
-        """Create a new record."""
-        obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)
+    async def create(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: Union[CreateSchemaType, Dict[str, Any]],
+        **extra_fields: Any
+    ) -> ModelType:
+        """Create a new record, optionally overriding fields (e.g. foreign keys)."""
+        if isinstance(obj_in, dict):
+            obj_in_data = obj_in
+        else:
+            obj_in_data = obj_in.model_dump()
+        db_obj = self.model(**{**obj_in_data, **extra_fields})
         db.add(db_obj)
         await db.commit()
-        await db.refresh(db_obj)
+        # Defaults are client-side and sessions don't expire on commit,
+        # so the instance is already complete without a refresh
         return db_obj
 
     async def update(
@@ -96,6 +106,47 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         await db.refresh(db_obj)
         return db_obj
 
+    async def update_by_id(
+        self,
+        db: AsyncSession,
+        *,
+        id: UUID,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Optional[ModelType]:
+        """
+        Update a record by ID in a single UPDATE ... RETURNING (no refresh).
+        
+        Returns None if no row matched.
+        """
+        return await self._update_where(db, (self.model.id == id,), obj_in)
+
+    async def _update_where(
+        self,
+        db: AsyncSession,
+        criteria: tuple,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Optional[ModelType]:
+        """Run UPDATE ... RETURNING for the rows matching `criteria` and commit."""
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+        
+        if not update_data:
+            result = await db.execute(select(self.model).where(*criteria))
+            return result.scalar_one_or_none()
+        
+        result = await db.execute(
+            update(self.model)
+            .where(*criteria)
+            .values(**update_data)
+            .returning(self.model)
+            .execution_options(populate_existing=True)
+        )
+        db_obj = result.scalar_one_or_none()
+        await db.commit()
+        return db_obj
+
     async def remove(self, db: AsyncSession, *, id: UUID) -> Optional[ModelType]:
         """Delete a record by ID."""
         obj = await self.get(db, id=id)
@@ -109,4 +160,29 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         result = await db.execute(
             select(func.count(self.model.id)).where(self.model.id == id)
         )
-        return result.scalar() > 0 
\ No newline at end of file
+        return result.scalar() > 0
+
+
+class AuthoredRepositoryMixin:
+    """
+    Ownership-scoped writes for repositories whose model has an `author_id`.
+    
+    Mix in ahead of BaseRepository, e.g.
+    `class EbookRepository(AuthoredRepositoryMixin, BaseRepository[...])`.
+    """
+
+    async def update_owned(
+        self,
+        db: AsyncSession,
+        *,
+        id: UUID,
+        author_id: UUID,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> Optional[ModelType]:
+        """
+        Update a record owned by `author_id` in a single UPDATE ... RETURNING.
+        
+        Returns None if no row matched (missing or owned by another user).
+        """
+        owned = (self.model.id == id, self.model.author_id == author_id)
+        return await self._update_where(db, owned, obj_in)
@@ -2,23 +2,47 @@
 Collection repository for database operations.
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 from uuid import UUID
 
 from sqlalchemy import and_, func, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.models.collection import Collection
 from app.models.ebook import PrivacyStatus
-from app.repositories.base import BaseRepository
+from app.models.user import User
+from app.repositories.base import AuthoredRepositoryMixin, BaseRepository
 from app.schemas.collection import CollectionCreate, CollectionUpdate
 
 
-class CollectionRepository(BaseRepository[Collection, CollectionCreate, CollectionUpdate]):
+class CollectionRepository(AuthoredRepositoryMixin, BaseRepository[Collection, CollectionCreate, CollectionUpdate]):
     """Repository for Collection model operations."""
 
+    async def create(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: Union[CollectionCreate, Dict[str, Any]],
+        **extra_fields: Any
+    ) -> Collection:
+        """Create a collection and return it with author and ebooks populated."""
+        if isinstance(obj_in, dict):
+            obj_in_data = obj_in
+        else:
+            obj_in_data = obj_in.model_dump()
+        db_obj = Collection(**{**obj_in_data, **extra_fields})
+        db.add(db_obj)
+        await db.commit()
+        
+        # A new collection has no ebooks, and its author is normally already
+        # in the session's identity map (loaded by auth), so no reload is needed
+        set_committed_value(db_obj, "ebooks", [])
+        set_committed_value(db_obj, "author", await db.get(User, db_obj.author_id))
+        return db_obj
+
     async def get_by_author_id(
         self,
         db: AsyncSession,
@@ -12,10 +12,10 @@ from sqlalchemy.orm import selectinload
 from app.models.ebook import Ebook, PrivacyStatus
 from app.models.user import User
 from app.schemas.ebook import EbookCreate, EbookUpdate
-from app.repositories.base import BaseRepository
+from app.repositories.base import AuthoredRepositoryMixin, BaseRepository
 
 
-class EbookRepository(BaseRepository[Ebook, EbookCreate, EbookUpdate]):
+class EbookRepository(AuthoredRepositoryMixin, BaseRepository[Ebook, EbookCreate, EbookUpdate]):
     def __init__(self):
         super().__init__(Ebook)
 
@@ -50,15 +50,19 @@ class EbookRepository(BaseRepository[Ebook, EbookCreate, EbookUpdate]):
         db: AsyncSession, 
         skip: int = 0, 
         limit: int = 100,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        author_id: Optional[UUID] = None
     ) -> List[Ebook]:
-        """Get public ebooks with optional search."""
+        """Get public ebooks with optional search and author filter."""
         query = (
             select(self.model)
             .options(selectinload(self.model.author))
             .where(self.model.status == PrivacyStatus.PUBLIC)
         )
         
+        if author_id:
+            query = query.where(self.model.author_id == author_id)
+        
         if search:
             search_filter = or_(
                 self.model.title.ilike(f"%{search}%"),
@@ -73,11 +77,15 @@ class EbookRepository(BaseRepository[Ebook, EbookCreate, EbookUpdate]):
     async def count_public_ebooks(
         self, 
         db: AsyncSession,
-        search: Optional[str] = None
+        search: Optional[str] = None,
+        author_id: Optional[UUID] = None
     ) -> int:
-        """Count public ebooks with optional search."""
+        """Count public ebooks with optional search and author filter."""
         query = select(func.count(self.model.id)).where(self.model.status == PrivacyStatus.PUBLIC)
         
+        if author_id:
+            query = query.where(self.model.author_id == author_id)
+        
         if search:
             search_filter = or_(
                 self.model.title.ilike(f"%{search}%"),
@@ -2,10 +2,11 @@
 User repository for database operations.
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from uuid import UUID
 
-from sqlalchemy import func, or_
+from sqlalchemy import and_, exists, func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -17,15 +18,41 @@ from app.schemas.user import OAuthUserCreate, UserUpdate
 class UserRepository(BaseRepository[User, OAuthUserCreate, UserUpdate]):
     """Repository for User model operations."""
 
+    async def insert_if_absent(
+        self,
+        db: AsyncSession,
+        *,
+        obj_in: Dict[str, Any],
+    ) -> User:
+        """
+        Insert a user unless one with the same id already exists.
+
+        Concurrent first logins for the same Supabase user race on the
+        primary key; ON CONFLICT DO NOTHING lets the loser read back the
+        winner's row instead of failing with an IntegrityError.
+        """
+        stmt = (
+            pg_insert(User)
+            .values(**obj_in)
+            .on_conflict_do_nothing(index_elements=[User.id])
+            .returning(User)
+        )
+        result = await db.execute(stmt)
+        user = result.scalars().first()
+        await db.commit()
+        if user is None:
+            user = await self.get(db, obj_in["id"])
+        return user
+
     async def get_by_username(
         self,
         db: AsyncSession,
         username: str,
     ) -> Optional[User]:
         """Get user by username."""
-        query = select(User).where(User.username == username)
+        query = select(User).where(User.username == username).limit(1)
         result = await db.execute(query)
-        return result.scalar_one_or_none()
+        return result.scalars().first()
 
     async def get_by_email(
         self,
@@ -33,9 +60,32 @@ class UserRepository(BaseRepository[User, OAuthUserCreate, UserUpdate]):
         email: str,
     ) -> Optional[User]:
         """Get user by email."""
-        query = select(User).where(User.email == email)
+        query = select(User).where(User.email == email).limit(1)
         result = await db.execute(query)
-        return result.scalar_one_or_none()
+        return result.scalars().first()
+
+    async def get_by_email_or_username(
+        self,
+        db: AsyncSession,
+        email: Optional[str],
+        username: str,
+    ) -> Dict[str, Optional[User]]:
+        """
+        Get the users matching an email and a username in one query.
+        
+        A missing email (Apple hidden email) never matches, rather than
+        matching every user without an email.
+        """
+        conditions = [User.username == username]
+        if email:
+            conditions.append(User.email == email)
+        query = select(User).where(or_(*conditions))
+        result = await db.execute(query)
+        users = result.scalars().all()
+        return {
+            "by_email": next((u for u in users if email and u.email == email), None),
+            "by_username": next((u for u in users if u.username == username), None),
+        }
 
     async def get_by_google_id(
         self,
@@ -43,9 +93,9 @@ class UserRepository(BaseRepository[User, OAuthUserCreate, UserUpdate]):
         google_id: str,
     ) -> Optional[User]:
         """Get user by Google ID."""
-        query = select(User).where(User.google_id == google_id)
+        query = select(User).where(User.google_id == google_id).limit(1)
         result = await db.execute(query)
-        return result.scalar_one_or_none()
+        return result.scalars().first()
 
     async def get_by_apple_id(
         self,
@@ -53,9 +103,9 @@ class UserRepository(BaseRepository[User, OAuthUserCreate, UserUpdate]):
         apple_id: str,
     ) -> Optional[User]:
         """Get user by Apple ID."""
-        query = select(User).where(User.apple_id == apple_id)
+        query = select(User).where(User.apple_id == apple_id).limit(1)
         result = await db.execute(query)
-        return result.scalar_one_or_none()
+        return result.scalars().first()
 
     async def search_users(
         self,
@@ -100,13 +150,31 @@ class UserRepository(BaseRepository[User, OAuthUserCreate, UserUpdate]):
         exclude_user_id: Optional[UUID] = None,
     ) -> bool:
         """Check if username exists (optionally excluding a specific user)."""
-        query = select(User.id).where(User.username == username)
+        condition = User.username == username
         
         if exclude_user_id:
-            query = query.where(User.id != exclude_user_id)
+            condition = and_(condition, User.id != exclude_user_id)
         
+        result = await db.execute(select(exists().where(condition)))
+        return result.scalar()
+
+    async def get_usernames_with_prefix(
+        self,
+        db: AsyncSession,
+        base_username: str,
+    ) -> List[str]:
+        """Get usernames equal to `base_username` or shaped like `base_username_<suffix>`."""
+        escaped = (
+            base_username.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        )
+        query = select(User.username).where(
+            or_(
+                User.username == base_username,
+                User.username.like(f"{escaped}\\_%", escape="\\"),
+            )
+        )
         result = await db.execute(query)
-        return result.scalar_one_or_none() is not None
+        return result.scalars().all()
 
     async def email_exists(
         self,
@@ -115,13 +183,13 @@ class UserRepository(BaseRepository[User, OAuthUserCreate, UserUpdate]):
         exclude_user_id: Optional[UUID] = None,
     ) -> bool:
         """Check if email exists (optionally excluding a specific user)."""
-        query = select(User.id).where(User.email == email)
+        condition = User.email == email
         
         if exclude_user_id:
-            query = query.where(User.id != exclude_user_id)
+            condition = and_(condition, User.id != exclude_user_id)
         
-        result = await db.execute(query)
-        return result.scalar_one_or_none() is not None
+        result = await db.execute(select(exists().where(condition)))
+        return result.scalar()
 
     async def get_active_users(
         self,
@@ -14,6 +14,10 @@ from . import user, ebook, collection, share, reading
 user.UserDashboard.model_rebuild()
 user.AuthResponse.model_rebuild()
 ebook.EbookWithAuthor.model_rebuild()
+ebook.EbookListItem.model_rebuild()
+ebook.EbookCard.model_rebuild()
+ebook.EbookList.model_rebuild()
+ebook.EbookFeed.model_rebuild()
 collection.CollectionWithAuthor.model_rebuild()
 collection.CollectionWithEbooks.model_rebuild()
 share.ShareLinkWithContent.model_rebuild()
@@ -6,7 +6,7 @@ from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from app.models.ebook import PrivacyStatus
 from app.models.collection import CollectionColor
@@ -43,8 +43,7 @@ class CollectionInDB(CollectionBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class Collection(CollectionInDB):
@@ -91,8 +90,7 @@ class EbookCoverPreview(BaseModel):
     title: str
     cover_image_url: Optional[str] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class CollectionGridItem(BaseModel):
@@ -108,8 +106,7 @@ class CollectionGridItem(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class CollectionGridList(BaseModel):
@@ -7,7 +7,7 @@ from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from app.models.ebook import PrivacyStatus
 
@@ -44,8 +44,7 @@ class EbookInDB(EbookBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class Ebook(EbookInDB):
@@ -73,8 +72,7 @@ class EbookListItem(BaseModel):
     download_count: int = 0
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class EbookCard(BaseModel):
@@ -90,8 +88,7 @@ class EbookCard(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class EbookDetail(EbookWithAuthor):
@@ -100,8 +97,7 @@ class EbookDetail(EbookWithAuthor):
     download_url: Optional[str] = None  # Generated download URL
     share_count: int = 0
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class EbookUpload(BaseModel):
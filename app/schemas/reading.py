@@ -6,7 +6,7 @@ from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
 from uuid import UUID
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, validator
 
 if TYPE_CHECKING:
     from app.schemas.ebook import Ebook
@@ -52,8 +52,7 @@ class ReadingProgressInDB(ReadingProgressBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class ReadingProgress(ReadingProgressInDB):
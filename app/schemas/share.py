@@ -6,7 +6,7 @@ from datetime import datetime, timedelta
 from typing import Optional, TYPE_CHECKING
 from uuid import UUID
 
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, validator
 
 from app.models.share import ShareableType
 
@@ -66,8 +66,7 @@ class ShareLinkInDB(ShareLinkBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class ShareLink(ShareLinkInDB):
@@ -3,17 +3,33 @@ OAuth-only User schemas for Google and Apple authentication.
 Frontend-friendly data models for mobile app development.
 """
 
+import re
 from datetime import datetime
 from typing import Optional, List, TYPE_CHECKING
 from uuid import UUID
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, ConfigDict, field_validator
 
 if TYPE_CHECKING:
     from app.schemas.ebook import EbookListItem
     from app.schemas.collection import CollectionWithAuthor
 
 
+# ASCII letters, numbers, hyphens and underscores
+_USERNAME_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def _validate_username(v: str) -> str:
+    """Shared username rules for create/update schemas."""
+    if not _USERNAME_PATTERN.fullmatch(v):
+        raise ValueError('Username can only contain letters, numbers, hyphens, and underscores')
+    if len(v) < 3:
+        raise ValueError('Username must be at least 3 characters')
+    if len(v) > 50:
+        raise ValueError('Username must be at most 50 characters')
+    return v
+
+
 # ============================================================================
 # AUTHENTICATION SCHEMAS
 # ============================================================================
@@ -59,13 +75,7 @@ class UserBase(BaseModel):
     @field_validator('username')
     @classmethod
     def username_validation(cls, v):
-        if not v.replace('_', '').replace('-', '').isalnum():
-            raise ValueError('Username can only contain letters, numbers, hyphens, and underscores')
-        if len(v) < 3:
-            raise ValueError('Username must be at least 3 characters')
-        if len(v) > 50:
-            raise ValueError('Username must be at most 50 characters')
-        return v
+        return _validate_username(v)
 
 
 class OAuthUserCreate(BaseModel):
@@ -78,13 +88,7 @@ class OAuthUserCreate(BaseModel):
     @field_validator('username')
     @classmethod
     def username_validation(cls, v):
-        if not v.replace('_', '').replace('-', '').isalnum():
-            raise ValueError('Username can only contain letters, numbers, hyphens, and underscores')
-        if len(v) < 3:
-            raise ValueError('Username must be at least 3 characters')
-        if len(v) > 50:
-            raise ValueError('Username must be at most 50 characters')
-        return v
+        return _validate_username(v)
 
 
 class UserUpdate(BaseModel):
@@ -96,12 +100,7 @@ class UserUpdate(BaseModel):
     @classmethod
     def username_validation(cls, v):
         if v is not None:
-            if not v.replace('_', '').replace('-', '').isalnum():
-                raise ValueError('Username can only contain letters, numbers, hyphens, and underscores')
-            if len(v) < 3:
-                raise ValueError('Username must be at least 3 characters')
-            if len(v) > 50:
-                raise ValueError('Username must be at most 50 characters')
+            return _validate_username(v)
         return v
 
 
@@ -123,8 +122,7 @@ class UserProfile(BaseModel):
     has_google: bool = False
     has_apple: bool = False
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class UserPublic(BaseModel):
@@ -134,8 +132,7 @@ class UserPublic(BaseModel):
     avatar_url: Optional[str] = None
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class UserListItem(BaseModel):
@@ -144,8 +141,7 @@ class UserListItem(BaseModel):
     username: str
     avatar_url: Optional[str] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class UsernameCheck(BaseModel):
@@ -175,8 +171,7 @@ class UserDashboard(BaseModel):
     recent_ebooks: List["EbookListItem"] = []
     recent_collections: List["CollectionWithAuthor"] = []
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 # ============================================================================
@@ -195,8 +190,7 @@ class UserInDB(BaseModel):
     updated_at: datetime
     last_login: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 # Note: model_rebuild() calls moved to __init__.py to handle circular imports 
\ No newline at end of file
@@ -2,7 +2,6 @@
 Collection service for business logic.
 """
 
-import math
 from typing import List, Optional
 from uuid import UUID
 
@@ -41,7 +40,7 @@ class CollectionService:
             db, skip=skip, limit=limit, search=search, author_id=author_id
         )
         
-        pages = math.ceil(total / limit) if limit > 0 else 1
+        pages = (total + limit - 1) // limit if limit > 0 else 1
         page = (skip // limit) + 1 if limit > 0 else 1
         
         return CollectionList(
@@ -77,12 +76,13 @@ class CollectionService:
             db, user_id=user_id, skip=skip, limit=limit
         )
         
+        # Inputs come straight from ORM rows, so skip re-validation with model_construct
         grid_items = []
         for collection in collections:
             # Limit to first 4 ebooks for preview and get their covers
             preview_ebooks = collection.ebooks[:4] if collection.ebooks else []
             cover_previews = [
-                EbookCoverPreview(
+                EbookCoverPreview.model_construct(
                     id=ebook.id,
                     title=ebook.title,
                     cover_image_url=ebook.cover_image_path  # This will need URL conversion
@@ -91,21 +91,21 @@ class CollectionService:
                 if ebook.cover_image_path  # Only include ebooks with covers
             ]
             
-            grid_item = CollectionGridItem(
+            grid_item = CollectionGridItem.model_construct(
                 id=collection.id,
                 name=collection.name,
                 description=collection.description,
                 status=collection.status,
                 color=collection.color,
                 author_id=collection.author_id,
-                ebook_count=len(collection.ebooks) if collection.ebooks else 0,
+                ebook_count=collection.ebook_count,
                 cover_previews=cover_previews,
                 created_at=collection.created_at,
                 updated_at=collection.updated_at,
             )
             grid_items.append(grid_item)
         
-        pages = math.ceil(total / limit) if limit > 0 else 1
+        pages = (total + limit - 1) // limit if limit > 0 else 1
         page = (skip // limit) + 1 if limit > 0 else 1
         
         return CollectionGridList(
@@ -145,18 +145,11 @@ class CollectionService:
         user_id: UUID,
     ) -> CollectionWithEbooks:
         """Create a new collection."""
-        collection_data = collection_in.model_dump()
-        collection_data["author_id"] = user_id
-        
         # Set random color if not provided
-        if not collection_data.get("color"):
-            collection_data["color"] = CollectionColor.random_color()
-        
-        collection = await collection_repository.create(db, obj_in=collection_data)
+        color = collection_in.color or CollectionColor.random_color()
         
-        # Reload with author and ebooks relationships
-        collection = await collection_repository.get_with_relationships(
-            db, collection.id, relationships=["author", "ebooks"]
+        collection = await collection_repository.create(
+            db, obj_in=collection_in, author_id=user_id, color=color
         )
         
         return CollectionWithEbooks.model_validate(collection)
@@ -169,25 +162,24 @@ class CollectionService:
         current_user: User,
     ) -> CollectionWithEbooks:
         """Update a collection."""
-        collection = await collection_repository.get(db, collection_id)
+        # Ownership is enforced by the UPDATE itself
+        collection = await collection_repository.update_owned(
+            db, id=collection_id, author_id=current_user.id, obj_in=collection_in
+        )
         
         if not collection:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Collection not found"
-            )
-        
-        # Check if user is the author
-        if collection.author_id != current_user.id:
+            # Only look up the row again to tell 404 from 403
+            if not await collection_repository.exists(db, collection_id):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Collection not found"
+                )
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Not authorized to update this collection"
             )
         
-        update_data = collection_in.model_dump(exclude_unset=True)
-        collection = await collection_repository.update(db, db_obj=collection, obj_in=update_data)
-        
-        # Reload with author and ebooks relationships
+        # Load author and ebooks for the response
         collection = await collection_repository.get_with_relationships(
             db, collection.id, relationships=["author", "ebooks"]
         )
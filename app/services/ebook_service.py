@@ -2,7 +2,7 @@
 Ebook service with privacy controls.
 """
 
-import math
+import asyncio
 from typing import List, Optional
 from uuid import UUID
 
@@ -32,10 +32,9 @@ class EbookService:
     ) -> Ebook:
         """Create a new ebook (private by default)."""
         # Create ebook with author_id
-        ebook_dict = ebook_data.dict()
-        ebook_dict['author_id'] = author_id
-        
-        ebook = await self.repository.create(db, obj_in=ebook_dict)
+        ebook = await self.repository.create(
+            db, obj_in=ebook_data, author_id=author_id
+        )
         return ebook
 
     async def upload_ebook_file(
@@ -57,12 +56,9 @@ class EbookService:
                 detail="Not authorized to upload file for this ebook"
             )
         
-        # Validate file size
-        self.storage.validate_file_size(file, max_size_mb=50)
-        
-        # Upload file
+        # Upload file (size is validated while streaming)
         file_path, file_size, _ = await self.storage.upload_ebook(
-            file, str(current_user.id)
+            file, str(current_user.id), max_size_mb=50
         )
         
         # Update ebook with file information
@@ -99,11 +95,10 @@ class EbookService:
                 detail="Not authorized to upload cover for this ebook"
             )
         
-        # Validate file size (smaller limit for images)
-        self.storage.validate_file_size(file, max_size_mb=5)
-        
-        # Upload cover image
-        cover_path = await self.storage.upload_cover_image(file, str(ebook_id))
+        # Upload cover image (smaller size limit for images)
+        cover_path = await self.storage.upload_cover_image(
+            file, str(ebook_id), max_size_mb=5
+        )
         
         # Update ebook with cover path
         await self.repository.update(
@@ -164,9 +159,12 @@ class EbookService:
                 total = await self.repository.count(db, author_id=author_id)
             else:
                 # For other users, only show public ebooks by this author
-                ebooks = await self.repository.get_public_ebooks(db, skip, limit, search)
-                ebooks = [e for e in ebooks if e.author_id == author_id]
-                total = len(ebooks)
+                ebooks = await self.repository.get_public_ebooks(
+                    db, skip, limit, search=search, author_id=author_id
+                )
+                total = await self.repository.count_public_ebooks(
+                    db, search=search, author_id=author_id
+                )
         else:
             # Get public ebooks
             ebooks = await self.repository.get_public_ebooks(
@@ -179,7 +177,7 @@ class EbookService:
             if ebook.cover_image_path:
                 ebook.cover_url = self.storage.get_cover_url(ebook.cover_image_path)
         
-        pages = math.ceil(total / limit) if limit > 0 else 1
+        pages = (total + limit - 1) // limit if limit > 0 else 1
         
         return EbookList(
             items=ebooks,
@@ -197,17 +195,18 @@ class EbookService:
         current_user: User
     ) -> Ebook:
         """Update an ebook."""
-        ebook = await self.repository.get(db, ebook_id)
-        if not ebook:
-            raise HTTPException(status_code=404, detail="Ebook not found")
-        
-        if ebook.author_id != current_user.id:
+        updated_ebook = await self.repository.update_owned(
+            db, id=ebook_id, author_id=current_user.id, obj_in=ebook_update
+        )
+        if not updated_ebook:
+            # Only look up the row again to tell 404 from 403
+            if not await self.repository.exists(db, ebook_id):
+                raise HTTPException(status_code=404, detail="Ebook not found")
             raise HTTPException(
                 status_code=403, 
                 detail="Not authorized to update this ebook"
             )
         
-        updated_ebook = await self.repository.update(db, db_obj=ebook, obj_in=ebook_update)
         return updated_ebook
 
     async def delete_ebook(
@@ -227,11 +226,16 @@ class EbookService:
                 detail="Not authorized to delete this ebook"
             )
         
-        # Delete files from storage
+        # Delete files from storage concurrently
+        deletions = []
         if ebook.file_path:
-            await self.storage.delete_file(ebook.file_path)
+            deletions.append(self.storage.delete_file(ebook.file_path))
         if ebook.cover_image_path:
-            await self.storage.delete_file(ebook.cover_image_path, self.storage.cover_bucket)
+            deletions.append(
+                self.storage.delete_file(ebook.cover_image_path, self.storage.cover_bucket)
+            )
+        if deletions:
+            await asyncio.gather(*deletions, return_exceptions=True)
         
         # Delete from database
         await self.repository.remove(db, id=ebook_id)
@@ -265,7 +269,7 @@ class EbookService:
         await self.repository.increment_download_count(db, ebook_id)
         
         # Generate download URL
-        download_url = self.storage.get_download_url(ebook.file_path)
+        download_url = await self.storage.get_download_url(ebook.file_path)
         return download_url
 
     async def get_popular_ebooks(self, db: AsyncSession, limit: int = 10) -> List[Ebook]:
@@ -2,27 +2,63 @@
 Storage service for handling file uploads and downloads with Supabase Storage.
 """
 
+import asyncio
 import os
 import uuid
-from typing import Optional, Tuple
-from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
+import httpx
+from cachetools import TTLCache
 from fastapi import UploadFile, HTTPException
-from supabase import create_client, Client
-
 from app.core.config import settings
+from app.core.http import get_async_client
+
+# Uploads are streamed to Supabase Storage in 64 KiB chunks
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Signed URLs are valid for an hour; cached copies are dropped 5 minutes
+# early so a URL handed out from the cache is always usable for a while
+SIGNED_URL_EXPIRES_IN = 3600
+SIGNED_URL_CACHE_TTL = SIGNED_URL_EXPIRES_IN - 300
+
+# Ebook formats have fixed MIME types, so the client's declared
+# content type is not trusted for them
+_EBOOK_MIME = {
+    '.epub': 'application/epub+zip',
+    '.pdf': 'application/pdf',
+    '.mobi': 'application/x-mobipocket-ebook',
+    '.txt': 'text/plain',
+}
+ALLOWED_EBOOK_EXTENSIONS = frozenset(_EBOOK_MIME)
+ALLOWED_COVER_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.webp'})
+UNSUPPORTED_EBOOK_FORMAT_DETAIL = (
+    f"Unsupported file format. Allowed formats: {', '.join(sorted(ALLOWED_EBOOK_EXTENSIONS))}"
+)
+UNSUPPORTED_COVER_FORMAT_DETAIL = (
+    f"Unsupported image format. Allowed formats: {', '.join(sorted(ALLOWED_COVER_EXTENSIONS))}"
+)
 
 
 class StorageService:
     def __init__(self):
-        self.supabase: Client = create_client(
-            settings.SUPABASE_URL, 
-            settings.SUPABASE_SERVICE_KEY
-        )
         self.ebook_bucket = "ebooks"
         self.cover_bucket = "covers"
+        self.storage_url = f"{settings.SUPABASE_URL}/storage/v1"
+        self.auth_headers = {
+            "Authorization": f"Bearer {settings.SUPABASE_SERVICE_KEY}",
+            "apikey": settings.SUPABASE_SERVICE_KEY,
+        }
+        # Upload headers per ebook extension, built once
+        self._ebook_upload_headers: Dict[str, Dict[str, str]] = {
+            ext: {**self.auth_headers, "Content-Type": mime}
+            for ext, mime in _EBOOK_MIME.items()
+        }
+        self._signed_url_cache: TTLCache = TTLCache(maxsize=4096, ttl=SIGNED_URL_CACHE_TTL)
+        self._signed_url_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
 
-    async def upload_ebook(self, file: UploadFile, author_id: str) -> Tuple[str, int, str]:
+    async def upload_ebook(
+        self, file: UploadFile, author_id: str, max_size_mb: int = 50
+    ) -> Tuple[str, int, str]:
         """
         Upload an ebook file to Supabase Storage.
         
@@ -30,28 +66,22 @@ class StorageService:
             Tuple of (file_path, file_size, file_format)
         """
         # Validate file type
-        allowed_formats = ['.epub', '.pdf', '.mobi', '.txt']
-        file_extension = Path(file.filename).suffix.lower()
+        file_extension = os.path.splitext(file.filename)[1].lower()
         
-        if file_extension not in allowed_formats:
+        if file_extension not in ALLOWED_EBOOK_EXTENSIONS:
             raise HTTPException(
                 status_code=400,
-                detail=f"Unsupported file format. Allowed formats: {', '.join(allowed_formats)}"
+                detail=UNSUPPORTED_EBOOK_FORMAT_DETAIL
             )
         
         # Generate unique filename
         unique_filename = f"{author_id}/{uuid.uuid4()}{file_extension}"
         
         try:
-            # Read file content
-            file_content = await file.read()
-            file_size = len(file_content)
-            
-            # Upload to Supabase Storage
-            response = self.supabase.storage.from_(self.ebook_bucket).upload(
-                unique_filename, 
-                file_content,
-                file_options={"content-type": file.content_type}
+            # Stream to Supabase Storage, enforcing the size limit on the way
+            response, file_size = await self._stream_upload(
+                self.ebook_bucket, unique_filename, file, max_size_mb,
+                headers=self._ebook_upload_headers[file_extension],
             )
             
             if response.status_code != 200:
@@ -62,13 +92,17 @@ class StorageService:
             
             return unique_filename, file_size, file_extension[1:]  # Remove dot from extension
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Error uploading ebook: {str(e)}"
             )
 
-    async def upload_cover_image(self, file: UploadFile, ebook_id: str) -> str:
+    async def upload_cover_image(
+        self, file: UploadFile, ebook_id: str, max_size_mb: int = 5
+    ) -> str:
         """
         Upload a cover image to Supabase Storage.
         
@@ -76,27 +110,21 @@ class StorageService:
             file_path
         """
         # Validate file type
-        allowed_formats = ['.jpg', '.jpeg', '.png', '.webp']
-        file_extension = Path(file.filename).suffix.lower()
+        file_extension = os.path.splitext(file.filename)[1].lower()
         
-        if file_extension not in allowed_formats:
+        if file_extension not in ALLOWED_COVER_EXTENSIONS:
             raise HTTPException(
                 status_code=400,
-                detail=f"Unsupported image format. Allowed formats: {', '.join(allowed_formats)}"
+                detail=UNSUPPORTED_COVER_FORMAT_DETAIL
             )
         
         # Generate unique filename
         unique_filename = f"{ebook_id}/cover{file_extension}"
         
         try:
-            # Read file content
-            file_content = await file.read()
-            
-            # Upload to Supabase Storage
-            response = self.supabase.storage.from_(self.cover_bucket).upload(
-                unique_filename, 
-                file_content,
-                file_options={"content-type": file.content_type}
+            # Stream to Supabase Storage, enforcing the size limit on the way
+            response, _ = await self._stream_upload(
+                self.cover_bucket, unique_filename, file, max_size_mb
             )
             
             if response.status_code != 200:
@@ -107,27 +135,54 @@ class StorageService:
             
             return unique_filename
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"Error uploading cover image: {str(e)}"
             )
 
-    def get_download_url(self, file_path: str, bucket: str = None) -> str:
+    async def get_download_url(self, file_path: str, bucket: str = None) -> str:
         """
-        Get a signed URL for downloading a file.
+        Get a signed URL for downloading a file, reusing a cached one when possible.
         """
         if bucket is None:
             bucket = self.ebook_bucket
-            
+        
+        cache_key = (bucket, file_path)
+        signed_url = self._signed_url_cache.get(cache_key)
+        if signed_url is not None:
+            return signed_url
+        
+        # One signing request per file on a cold cache, concurrent callers wait for it
+        lock = self._signed_url_locks.setdefault(cache_key, asyncio.Lock())
+        try:
+            async with lock:
+                signed_url = self._signed_url_cache.get(cache_key)
+                if signed_url is None:
+                    signed_url = await self._create_signed_url(bucket, file_path)
+                    self._signed_url_cache[cache_key] = signed_url
+        finally:
+            if not lock.locked():
+                self._signed_url_locks.pop(cache_key, None)
+        return signed_url
+
+    async def _create_signed_url(self, bucket: str, file_path: str) -> str:
+        """
+        Request a signed URL for downloading a file.
+        """
         try:
-            response = self.supabase.storage.from_(bucket).create_signed_url(
-                file_path, 
-                expires_in=3600  # 1 hour
+            response = await get_async_client().post(
+                f"{self.storage_url}/object/sign/{bucket}/{file_path}",
+                json={"expiresIn": SIGNED_URL_EXPIRES_IN},
+                headers=self.auth_headers,
             )
+            data = response.json() if response.status_code == 200 else {}
             
-            if 'signedURL' in response:
-                return response['signedURL']
+            if 'signedURL' in data:
+                # The API returns a path relative to the storage endpoint
+                return f"{self.storage_url}{data['signedURL']}"
             else:
                 raise HTTPException(
                     status_code=500,
@@ -144,39 +199,92 @@ class StorageService:
         """
         Get a public URL for a cover image.
         """
-        try:
-            response = self.supabase.storage.from_(self.cover_bucket).get_public_url(file_path)
-            return response['publicURL']
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error getting cover URL: {str(e)}"
-            )
+        return f"{self.storage_url}/object/public/{self.cover_bucket}/{file_path}"
 
     async def delete_file(self, file_path: str, bucket: str = None) -> bool:
         """
         Delete a file from Supabase Storage.
         """
+        return await self.delete_files([file_path], bucket)
+
+    async def delete_files(self, file_paths: List[str], bucket: str = None) -> bool:
+        """
+        Delete several files from one bucket in a single Supabase Storage request.
+        """
+        if not file_paths:
+            return True
         if bucket is None:
             bucket = self.ebook_bucket
             
         try:
-            response = self.supabase.storage.from_(bucket).remove([file_path])
+            response = await get_async_client().request(
+                "DELETE",
+                f"{self.storage_url}/object/{bucket}",
+                json={"prefixes": file_paths},
+                headers=self.auth_headers,
+            )
             return response.status_code == 200
         except Exception as e:
             # Log error but don't raise exception for cleanup operations
-            print(f"Error deleting file {file_path}: {str(e)}")
+            print(f"Error deleting files {file_paths}: {str(e)}")
             return False
 
+    async def _stream_upload(
+        self,
+        bucket: str,
+        file_path: str,
+        file: UploadFile,
+        max_size_mb: int,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[httpx.Response, int]:
+        """
+        Stream an upload to the Supabase Storage REST API without buffering it.
+        
+        Without explicit headers, the client-declared content type is used.
+        
+        Returns:
+            Tuple of (response, uploaded byte count)
+        """
+        # Cheap rejection when the client declared the size up front
+        self.validate_file_size(file, max_size_mb=max_size_mb)
+        
+        max_size_bytes = max_size_mb * 1024 * 1024
+        file_size = 0
+        
+        async def chunks() -> AsyncIterator[bytes]:
+            nonlocal file_size
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                file_size += len(chunk)
+                if file_size > max_size_bytes:
+                    # Aborts the request mid-stream
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File size exceeds maximum allowed size of {max_size_mb}MB"
+                    )
+                yield chunk
+        
+        if headers is None:
+            headers = {
+                **self.auth_headers,
+                "Content-Type": file.content_type or "application/octet-stream",
+            }
+        response = await get_async_client().post(
+            f"{self.storage_url}/object/{bucket}/{file_path}",
+            content=chunks(),
+            headers=headers,
+            timeout=httpx.Timeout(60.0),  # Large files take longer than the default
+        )
+        return response, file_size
+
     def validate_file_size(self, file: UploadFile, max_size_mb: int = 50) -> None:
         """
-        Validate file size.
+        Validate the client-declared file size (413, same as the streaming check).
         """
         if hasattr(file, 'size') and file.size:
             max_size_bytes = max_size_mb * 1024 * 1024
             if file.size > max_size_bytes:
                 raise HTTPException(
-                    status_code=400,
+                    status_code=413,
                     detail=f"File size exceeds maximum allowed size of {max_size_mb}MB"
                 )
 
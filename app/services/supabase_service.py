@@ -2,11 +2,15 @@
 Supabase integration service for JWT verification and user data extraction.
 """
 
+import base64
+import hashlib
 import httpx
+import json
 import jwt
 import logging
+import time
 from typing import Dict, Any, Optional
-from uuid import UUID
+from cachetools import TTLCache
 from fastapi import HTTPException
 
 from app.core.config import settings
@@ -14,6 +18,48 @@ from app.core.config import settings
 # Set up logger
 logger = logging.getLogger(__name__)
 
+# Verified token claims keyed by SHA-256 of the token. Entries live at most
+# TOKEN_CACHE_TTL seconds and are never served past the token's own `exp`.
+# Only touched from the event loop thread, so no locking is needed.
+TOKEN_CACHE_TTL = 30
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=TOKEN_CACHE_TTL)
+
+# Claims every token from our Supabase instance must carry
+EXPECTED_ISSUER = f"{settings.SUPABASE_URL}/auth/v1"
+EXPECTED_AUDIENCE = "authenticated"
+
+# Metadata fields holding the avatar URL, in order of preference, per provider.
+# Apple doesn't typically provide avatar URLs.
+AVATAR_FIELDS = {
+    "google": ("avatar_url", "picture"),
+    "apple": ("avatar_url",),
+}
+
+
+def _decode_claims(token: str) -> Dict[str, Any]:
+    """
+    Decode the JWT payload without verifying the signature (Supabase already did).
+    
+    Raises the same PyJWT exceptions as jwt.decode for malformed or expired tokens.
+    """
+    try:
+        _, claims_b64, _ = token.split(".", 2)
+        padding = "=" * (-len(claims_b64) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(claims_b64 + padding))
+    except ValueError as e:
+        raise jwt.DecodeError(f"Malformed token: {e}") from e
+    
+    if not isinstance(claims, dict):
+        raise jwt.DecodeError("Invalid payload string: must be a json object")
+    
+    exp = claims.get("exp")
+    if exp is not None:
+        if not isinstance(exp, (int, float)):
+            raise jwt.DecodeError("Expiration Time claim (exp) must be a number")
+        if exp <= time.time():
+            raise jwt.ExpiredSignatureError("Signature has expired")
+    return claims
+
 
 async def verify_supabase_token(token: str) -> Dict[str, Any]:
     """
@@ -28,47 +74,46 @@ async def verify_supabase_token(token: str) -> Dict[str, Any]:
     Raises:
         HTTPException: If token is invalid or expired
     """
-    logger.info("🔐 Starting Supabase token verification")
+    cache_key = hashlib.sha256(token.encode()).digest()
+    cached_token = _token_cache.get(cache_key)
+    if cached_token is not None and cached_token["exp"] > time.time():
+        return cached_token
     
     try:
         # Decode JWT without signature verification (Supabase already verified it)
         # We just need to extract the user data
-        logger.info("🔓 Decoding JWT token (without signature verification)")
-        decoded_token = jwt.decode(
-            token,
-            options={"verify_signature": False},
-            audience="authenticated"
-        )
+        decoded_token = _decode_claims(token)
         
-        # Log token info (safely)
-        iss = decoded_token.get("iss", "no-issuer")
-        aud = decoded_token.get("aud", "no-audience")
-        sub = decoded_token.get("sub", "no-subject")
-        exp = decoded_token.get("exp", "no-expiry")
-        logger.info(f"📋 Token info - Issuer: {iss}, Audience: {aud}, Subject: {sub}, Expires: {exp}")
+        iss = decoded_token.get("iss")
+        aud = decoded_token.get("aud")
+        logger.debug(
+            "Token info iss=%s aud=%s sub=%s exp=%s",
+            iss, aud, decoded_token.get("sub"), decoded_token.get("exp")
+        )
         
         # Verify token is from our Supabase instance
-        expected_issuer = f"{settings.SUPABASE_URL}/auth/v1"
-        logger.info(f"🔍 Checking issuer: Expected='{expected_issuer}', Actual='{iss}'")
-        if decoded_token.get("iss") != expected_issuer:
-            logger.error(f"❌ Token issuer mismatch! Expected: {expected_issuer}, Got: {iss}")
+        if iss != EXPECTED_ISSUER:
+            logger.error("❌ Token issuer mismatch! Expected: %s, Got: %s", EXPECTED_ISSUER, iss)
             raise HTTPException(
                 status_code=401, 
                 detail="Invalid token issuer"
             )
         
-        # Verify token audience
-        logger.info(f"🔍 Checking audience: Expected='authenticated', Actual='{aud}'")
-        if decoded_token.get("aud") != "authenticated":
-            logger.error(f"❌ Token audience mismatch! Expected: authenticated, Got: {aud}")
+        # Verify token audience (a single value or a list per RFC 7519)
+        if aud != EXPECTED_AUDIENCE and not (isinstance(aud, list) and EXPECTED_AUDIENCE in aud):
+            logger.error("❌ Token audience mismatch! Expected: %s, Got: %s", EXPECTED_AUDIENCE, aud)
             raise HTTPException(
                 status_code=401, 
                 detail="Invalid token audience"
             )
         
-        logger.info("✅ Token verification successful!")
+        # Only successful verifications are cached, and only when they expire
+        if isinstance(decoded_token.get("exp"), (int, float)):
+            _token_cache[cache_key] = decoded_token
         return decoded_token
         
+    except HTTPException:
+        raise
     except jwt.ExpiredSignatureError:
         logger.error("❌ Token has expired")
         raise HTTPException(
@@ -76,14 +121,13 @@ async def verify_supabase_token(token: str) -> Dict[str, Any]:
             detail="Token has expired"
         )
     except jwt.InvalidTokenError as e:
-        logger.error(f"❌ Invalid token format: {str(e)}")
+        logger.error("❌ Invalid token format: %s", e)
         raise HTTPException(
             status_code=401, 
             detail=f"Invalid token: {str(e)}"
         )
     except Exception as e:
-        logger.error(f"💥 Unexpected error during token verification: {type(e).__name__}: {str(e)}")
-        logger.exception("Full exception traceback:")
+        logger.error("💥 Unexpected error during token verification: %s: %s", type(e).__name__, e)
         raise HTTPException(
             status_code=401, 
             detail=f"Token verification failed: {str(e)}"
@@ -100,11 +144,8 @@ def extract_user_data(supabase_token_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dict with standardized user data
     """
-    logger.info("📊 Extracting user data from Supabase token")
-    
     # Get user ID (this matches Supabase auth.users.id)
     user_id = supabase_token_data.get("sub")
-    logger.info(f"👤 User ID: {user_id}")
     if not user_id:
         logger.error("❌ No user ID found in token")
         raise HTTPException(status_code=401, detail="No user ID in token")
@@ -112,35 +153,36 @@ def extract_user_data(supabase_token_data: Dict[str, Any]) -> Dict[str, Any]:
     # Get app metadata (contains provider info)
     app_metadata = supabase_token_data.get("app_metadata", {})
     provider = app_metadata.get("provider", "unknown")
-    logger.info(f"🔐 Provider: {provider}")
-    logger.info(f"📱 App metadata: {app_metadata}")
     
     # Get user metadata (contains profile info from OAuth)
     user_metadata = supabase_token_data.get("user_metadata", {})
-    logger.info(f"👤 User metadata: {user_metadata}")
     
     # Extract email (may be None for Apple privacy)
     email = supabase_token_data.get("email")
-    logger.info(f"📧 Email: {email}")
     
     # Extract avatar URL from provider
-    avatar_url = None
-    if provider == "google":
-        avatar_url = user_metadata.get("avatar_url") or user_metadata.get("picture")
-    elif provider == "apple":
-        # Apple doesn't typically provide avatar URLs
-        avatar_url = user_metadata.get("avatar_url")
-    logger.info(f"🖼️ Avatar URL: {avatar_url}")
+    avatar_url = next(
+        (
+            user_metadata[field]
+            for field in AVATAR_FIELDS.get(provider, ())
+            if user_metadata.get(field)
+        ),
+        None,
+    )
     
     extracted_data = {
-        "id": UUID(user_id),  # Convert to UUID for database
+        "id": user_id,  # Raw string; converted to UUID only at the DB boundary
         "email": email,
         "provider": provider,
         "avatar_url": avatar_url,
         "raw_user_metadata": user_metadata,  # For debugging/future use
     }
     
-    logger.info(f"✅ Successfully extracted user data: {extracted_data}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Extracted user data id=%s provider=%s app_metadata=%s user_metadata=%s",
+            user_id, provider, app_metadata, user_metadata
+        )
     return extracted_data
 
 
@@ -156,13 +198,8 @@ async def get_supabase_user_info(token: str) -> Dict[str, Any]:
     Returns:
         Dict with user data ready for database operations
     """
-    logger.info("🚀 Starting Supabase user info extraction")
-    
     # Verify token and get decoded data
     token_data = await verify_supabase_token(token)
     
     # Extract standardized user data
-    user_data = extract_user_data(token_data)
-    
-    logger.info("🎉 Supabase user info extraction completed successfully")
-    return user_data 
\ No newline at end of file
+    return extract_user_data(token_data) 
\ No newline at end of file
@@ -2,18 +2,28 @@
 User service for Supabase-integrated business logic operations.
 """
 
+import re
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from uuid import UUID
-import uuid
 
+from cachetools import TTLCache
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.models.user import User
 from app.repositories.user import user_repository
 from app.schemas.user import OAuthUserCreate, UserUpdate
 
+# Users whose last_login was written recently; repeat logins inside the
+# window skip the DB write (per worker process)
+LAST_LOGIN_THROTTLE_SECONDS = 60
+_recent_logins: TTLCache = TTLCache(maxsize=10_000, ttl=LAST_LOGIN_THROTTLE_SECONDS)
+
+# Characters not allowed in generated usernames
+USERNAME_STRIP_PATTERN = re.compile(r"[^a-z0-9_-]")
+
 
 async def get_user_by_id(db: AsyncSession, user_id: UUID) -> Optional[User]:
     """Get user by ID (same as Supabase auth.users.id)."""
@@ -25,6 +35,13 @@ async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User
     return await user_repository.get_by_username(db, username)
 
 
+async def username_exists(
+    db: AsyncSession, username: str, exclude_user_id: Optional[UUID] = None
+) -> bool:
+    """Check whether a username is taken (optionally ignoring one user)."""
+    return await user_repository.username_exists(db, username, exclude_user_id=exclude_user_id)
+
+
 async def get_users(
     db: AsyncSession,
     skip: int = 0,
@@ -50,7 +67,7 @@ async def create_user_from_supabase(db: AsyncSession, supabase_user_data: Dict[s
     Returns:
         Created User object
     """
-    user_id = supabase_user_data["id"]  # UUID from Supabase
+    user_id = supabase_user_data["id"]  # UUID string from Supabase
     email = supabase_user_data["email"]
     provider = supabase_user_data["provider"]
     avatar_url = supabase_user_data["avatar_url"]
@@ -60,27 +77,41 @@ async def create_user_from_supabase(db: AsyncSession, supabase_user_data: Dict[s
         base_username = email.split("@")[0]
     else:
         # For Apple users with hidden email
-        base_username = f"{provider}_user_{str(user_id)[:8]}"
+        base_username = f"{provider}_user_{user_id[:8]}"
     
     # Ensure username is unique
     username = await _generate_unique_username(db, base_username)
     
-    # Create user using repository
-    user_data = OAuthUserCreate(
-        username=username,
-        google_id=user_id if provider == "google" else None,
-        apple_id=user_id if provider == "apple" else None,
-        avatar_url=avatar_url,
-    )
-    
-    # Create user with Supabase UUID as primary key
-    user_dict = user_data.model_dump()
-    user_dict["id"] = user_id  # Use Supabase UUID directly!
-    user_dict["email"] = email
-    user_dict["provider"] = provider
-    user_dict["is_active"] = True
-    
-    return await user_repository.create(db, obj_in=user_dict)
+    # Validate the generated profile fields
+    user_data = OAuthUserCreate(username=username, avatar_url=avatar_url)
+
+    # Create user with Supabase UUID as primary key; provider ids are not
+    # columns on User, the provider name is stored instead
+    user_dict = {
+        "id": UUID(user_id),  # Use Supabase UUID directly!
+        "username": user_data.username,
+        "email": email,
+        "provider": provider,
+        "avatar_url": user_data.avatar_url,
+        "is_active": True,
+    }
+
+    return await user_repository.insert_if_absent(db, obj_in=user_dict)
+
+
+async def get_or_create_user_from_supabase(
+    db: AsyncSession, supabase_user_data: Dict[str, Any]
+) -> Tuple[User, bool]:
+    """
+    Return the user for a Supabase identity, creating it on first login.
+
+    Returns:
+        Tuple of (user, created)
+    """
+    user = await user_repository.get(db, UUID(supabase_user_data["id"]))
+    if user:
+        return user, False
+    return await create_user_from_supabase(db, supabase_user_data), True
 
 
 async def update_user(
@@ -88,57 +119,63 @@ async def update_user(
 ) -> User:
     """Update user information."""
     update_data = user_update.model_dump(exclude_unset=True)
+    if not update_data:
+        return user
     
     # If updating username, ensure it's unique
     if "username" in update_data:
         if await user_repository.username_exists(db, update_data["username"], exclude_user_id=user.id):
             raise ValueError("Username already exists")
     
-    return await user_repository.update(db, db_obj=user, obj_in=update_data)
+    return await user_repository.update_by_id(db, id=user.id, obj_in=update_data)
 
 
 async def update_last_login(db: AsyncSession, user: User) -> User:
-    """Update user's last login timestamp."""
-    user.last_login = datetime.utcnow()
+    """Update user's last login timestamp, writing at most once per throttle window."""
+    now = datetime.utcnow()
+    if user.id in _recent_logins:
+        # Reflect the login on the instance without scheduling a write
+        set_committed_value(user, "last_login", now)
+        return user
+    
+    user.last_login = now
     await db.commit()
-    await db.refresh(user)
+    _recent_logins[user.id] = True
     return user
 
 
-async def is_active(user: User) -> bool:
+def is_active(user: User) -> bool:
     """Check if user is active."""
     return user.is_active
 
 
 async def _generate_unique_username(db: AsyncSession, base_username: str) -> str:
     """Generate a unique username by adding numbers if needed."""
-    # Clean the base username
-    base_username = base_username.lower().replace(" ", "_")
-    # Remove any non-alphanumeric characters except underscores and hyphens
-    base_username = "".join(c for c in base_username if c.isalnum() or c in ["_", "-"])
+    # Clean the base username, removing anything but ASCII letters, numbers,
+    # underscores and hyphens
+    base_username = USERNAME_STRIP_PATTERN.sub("", base_username.lower().replace(" ", "_"))
     
     # Ensure it's not empty
     if not base_username:
         base_username = "user"
     
-    # Check if base username is available
-    if not await user_repository.username_exists(db, base_username):
+    # Fetch the base username and all its numbered variants in one query
+    taken = set(await user_repository.get_usernames_with_prefix(db, base_username))
+    if base_username not in taken:
         return base_username
     
-    # If not available, add numbers
+    # If not available, use the first free number
+    suffix_pattern = re.compile(rf"{re.escape(base_username)}_(\d+)")
+    used_numbers = {
+        int(match.group(1))
+        for match in map(suffix_pattern.fullmatch, taken)
+        if match
+    }
     counter = 1
-    while True:
-        test_username = f"{base_username}_{counter}"
-        if not await user_repository.username_exists(db, test_username):
-            return test_username
+    while counter in used_numbers:
         counter += 1
-        
-        # Safety limit to prevent infinite loops
-        if counter > 1000:
-            test_username = f"{base_username}_{uuid.uuid4().hex[:6]}"
-            break
     
-    return test_username
+    return f"{base_username}_{counter}"
 
 
 # Legacy functions - kept for compatibility but will be removed
@@ -166,7 +203,6 @@ async def link_google_account(db: AsyncSession, user: User, google_id: str) -> U
     """Link Google account to existing user."""
     user.google_id = google_id
     await db.commit()
-    await db.refresh(user)
     return user
 
 
@@ -174,5 +210,4 @@ async def link_apple_account(db: AsyncSession, user: User, apple_id: str) -> Use
     """Link Apple account to existing user."""
     user.apple_id = apple_id
     await db.commit()
-    await db.refresh(user)
     return user 
\ No newline at end of file
@@ -5,8 +5,70 @@ Automatically selects the best matching book template color for each cover.
 """
 
 import os
-import glob
-from mask_algo import apply_cover_to_book
+import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from mask_algo import COLOR_MATCH_VERSION, TEMPLATE_COLORS, apply_cover_to_book, load_book_assets
+
+# Book templates and mask, decoded once per worker process
+_templates = None
+_mask_image = None
+
+def _init_worker(originals_dir, mask_path):
+    """Decode the book templates and mask once in each worker process."""
+    global _templates, _mask_image
+    _templates, _mask_image = load_book_assets(originals_dir, mask_path)
+
+def _cover_cache_key(cover_file):
+    """Key a cover by path, modification time and size for the color cache."""
+    stat = os.stat(cover_file)
+    return f"{cover_file}:{stat.st_mtime}:{stat.st_size}"
+
+def _color_cache_version():
+    """Identify the color matching logic and template set a cache was built with."""
+    return f"{COLOR_MATCH_VERSION}:{json.dumps(TEMPLATE_COLORS, sort_keys=True)}"
+
+def _load_color_cache(cache_path):
+    """Load the cover -> template cache from a previous run, if it is still valid."""
+    try:
+        with open(cache_path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _color_cache_version():
+        return {}
+    return data.get("covers", {})
+
+def _save_color_cache(cache_path, covers):
+    """Write the cover -> template cache for the covers seen in this run."""
+    with open(cache_path, "w") as f:
+        json.dump({"version": _color_cache_version(), "covers": covers}, f)
+
+def _process_one(cover_file, output_dir, mask_path, originals_dir, cached_template=None):
+    """
+    Generate the book image for a single cover. Runs in a worker process.
+    Returns (output_file, template_name).
+    """
+    # Get the base filename without extension
+    cover_name = os.path.splitext(os.path.basename(cover_file))[0]
+    output_file = os.path.join(output_dir, f"{cover_name}_book.png")
+    
+    print(f"Processing: {os.path.basename(cover_file)}")
+    
+    # Apply the cover to book with color matching, unless the template is cached
+    template_name = apply_cover_to_book(
+        book_template_path="originals/white.png",  # Default, will be overridden
+        user_cover_path=cover_file,
+        mask_path=mask_path,
+        output_path=output_file,
+        originals_dir=originals_dir,
+        templates=_templates,
+        mask_image=_mask_image,
+        precomputed_template=cached_template
+    )
+    # apply_cover_to_book reports its own errors and returns None on failure
+    if template_name is None:
+        raise RuntimeError("cover could not be applied (see error above)")
+    return output_file, template_name
 
 def batch_process_covers():
     """
@@ -22,11 +84,12 @@ def batch_process_covers():
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
-    # Get all cover files
-    cover_extensions = ["*.jpg", "*.jpeg", "*.png", "*.bmp"]
-    cover_files = []
-    for ext in cover_extensions:
-        cover_files.extend(glob.glob(os.path.join(covers_dir, ext)))
+    # Get all cover files in a single directory scan
+    cover_extensions = {".jpg", ".jpeg", ".png", ".bmp"}
+    cover_files = sorted(
+        entry.path for entry in os.scandir(covers_dir)
+        if entry.is_file() and os.path.splitext(entry.name)[1].lower() in cover_extensions
+    )
     
     if not cover_files:
         print(f"No cover files found in {covers_dir}")
@@ -37,36 +100,45 @@ def batch_process_covers():
         print(f"  - {os.path.basename(cover_file)}")
     print()
     
-    # Process each cover
+    # Template choices from previous runs, keyed by cover path, mtime and size
+    cache_path = os.path.join(output_dir, ".color_cache.json")
+    color_cache = _load_color_cache(cache_path)
+    cache_keys = {cover_file: _cover_cache_key(cover_file) for cover_file in cover_files}
+    # Only covers processed successfully in this run are saved, so entries for
+    # deleted or changed covers drop out
+    seen_cache = {}
+    
+    # Process covers in parallel, one job per cover across all CPU cores
     successful = 0
     failed = 0
     
-    for cover_file in cover_files:
-        try:
-            # Get the base filename without extension
-            cover_name = os.path.splitext(os.path.basename(cover_file))[0]
-            output_file = os.path.join(output_dir, f"{cover_name}_book.png")
-            
-            print(f"Processing: {os.path.basename(cover_file)}")
-            print("-" * 50)
-            
-            # Apply the cover to book with color matching
-            apply_cover_to_book(
-                book_template_path="originals/white.png",  # Default, will be overridden
-                user_cover_path=cover_file,
-                mask_path=mask_path,
-                output_path=output_file,
-                originals_dir=originals_dir
-            )
-            
-            successful += 1
-            print(f"✅ Successfully generated: {output_file}")
-            print()
-            
-        except Exception as e:
-            failed += 1
-            print(f"❌ Failed to process {cover_file}: {e}")
-            print()
+    with ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        initializer=_init_worker,
+        initargs=(originals_dir, mask_path)
+    ) as executor:
+        futures = {
+            executor.submit(
+                _process_one, cover_file, output_dir, mask_path, originals_dir,
+                color_cache.get(cache_keys[cover_file])
+            ): cover_file
+            for cover_file in cover_files
+        }
+        
+        for future in as_completed(futures):
+            cover_file = futures[future]
+            try:
+                output_file, template_name = future.result()
+                seen_cache[cache_keys[cover_file]] = template_name
+                successful += 1
+                print(f"✅ Successfully generated: {output_file}")
+                
+            except Exception as e:
+                failed += 1
+                print(f"❌ Failed to process {cover_file}: {e}")
+    print()
+    
+    _save_color_cache(cache_path, seen_cache)
     
     # Summary
     print("=" * 60)
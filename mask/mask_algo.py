@@ -1,89 +1,157 @@
 from PIL import Image
 import math
 import os
-from collections import Counter
+
+import numpy as np
+
+# PyTurboJPEG decodes JPEG covers directly through libturbojpeg; optional
+try:
+    from turbojpeg import TJPF_RGB, TurboJPEG
+    _TJ = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    _TJ = None
+
+# Bump when get_dominant_color or template matching changes, so cached
+# template choices from earlier runs are discarded
+COLOR_MATCH_VERSION = 1
+
+# Representative colors for each book template
+TEMPLATE_COLORS = {
+    'black.png': (30, 30, 30),
+    'blue.png': (70, 130, 180),
+    'green.png': (60, 120, 60),
+    'red.png': (180, 60, 60),
+    'grey.png': (120, 120, 120),
+    'white.png': (240, 240, 240)
+}
+_TEMPLATE_NAMES = tuple(TEMPLATE_COLORS)
+_TEMPLATE_RGB = np.array(list(TEMPLATE_COLORS.values()), dtype=np.int32)
 
 def get_dominant_color(image):
     """
     Extract the dominant color from an image by analyzing pixel frequencies.
-    Returns RGB tuple of the most common color.
+    Returns RGB tuple of the most common quantized color.
     """
-    # Resize image for faster processing
-    small_image = image.resize((50, 50))
-    pixels = list(small_image.getdata())
+    # Resize image for faster processing and read the raw RGB bytes directly,
+    # without boxing each pixel into a Python tuple
+    small_image = image.resize((50, 50)).convert('RGB')
+    pixels = np.frombuffer(small_image.tobytes(), dtype=np.uint8).reshape(-1, 3)
     
     # Remove very light/white pixels (background) from consideration
-    filtered_pixels = [pixel for pixel in pixels if sum(pixel[:3]) < 700]
-    
-    if not filtered_pixels:
-        # If all pixels are light, use all pixels
-        filtered_pixels = pixels
+    keep = pixels.sum(axis=1, dtype=np.uint16) < 700
+    # If all pixels are light, use all pixels
+    filtered_pixels = pixels[keep] if keep.any() else pixels
     
-    # Count color frequencies
-    color_count = Counter(filtered_pixels)
-    dominant_color = color_count.most_common(1)[0][0]
+    # Count color frequencies in 5-bit-per-channel buckets, so near-identical
+    # shades (JPEG noise, gradients) vote for the same color
+    quantized = (filtered_pixels >> 3).astype(np.uint32)
+    buckets = (quantized[:, 0] << 10) | (quantized[:, 1] << 5) | quantized[:, 2]
+    dominant = int(np.bincount(buckets, minlength=1 << 15).argmax())
     
-    return dominant_color[:3]  # Return RGB only
-
-def color_distance(color1, color2):
-    """Calculate Euclidean distance between two RGB colors."""
-    return math.sqrt(sum((a - b) ** 2 for a, b in zip(color1, color2)))
+    # Return the center of the winning bucket
+    return (
+        ((dominant >> 10) & 31) << 3 | 4,
+        ((dominant >> 5) & 31) << 3 | 4,
+        (dominant & 31) << 3 | 4,
+    )
 
 def find_closest_book_template(cover_color, originals_dir):
     """
     Find the closest matching book template based on cover's dominant color.
     """
-    # Define representative colors for each book template
-    template_colors = {
-        'black.png': (30, 30, 30),
-        'blue.png': (70, 130, 180),
-        'green.png': (60, 120, 60),
-        'red.png': (180, 60, 60),
-        'grey.png': (120, 120, 120),
-        'white.png': (240, 240, 240)
-    }
-    
-    # Find the closest color match
-    min_distance = float('inf')
-    best_template = 'white.png'  # Default fallback
-    
-    for template, template_color in template_colors.items():
-        distance = color_distance(cover_color, template_color)
-        if distance < min_distance:
-            min_distance = distance
-            best_template = template
+    # Nearest template by squared distance (sqrt doesn't change the ordering)
+    distances = ((_TEMPLATE_RGB - np.asarray(cover_color, dtype=np.int32)) ** 2).sum(axis=1)
+    best_template = _TEMPLATE_NAMES[int(distances.argmin())]
     
     template_path = os.path.join(originals_dir, best_template)
     return template_path, best_template
 
-def apply_cover_to_book(book_template_path, user_cover_path, mask_path, output_path, originals_dir=None):
+def _perspective_coeffs(src_quad, dst_quad):
+    """
+    Solve for the 8 PIL perspective coefficients that warp src_quad onto dst_quad.
+    PIL maps each output pixel back to the input, so the system is set up
+    from destination points to source points.
+    """
+    rows = []
+    rhs = []
+    for (x, y), (u, v) in zip(dst_quad, src_quad):
+        rows.append([x, y, 1, 0, 0, 0, -u * x, -u * y])
+        rows.append([0, 0, 0, x, y, 1, -v * x, -v * y])
+        rhs.extend((u, v))
+    return np.linalg.solve(np.array(rows, dtype=np.float64), np.array(rhs, dtype=np.float64)).tolist()
+
+def _open_cover(user_cover_path):
+    """Open a cover image, decoding JPEGs with libturbojpeg when it is available."""
+    if _TJ is not None and os.path.splitext(user_cover_path)[1].lower() in ('.jpg', '.jpeg'):
+        try:
+            with open(user_cover_path, 'rb') as f:
+                return Image.fromarray(_TJ.decode(f.read(), pixel_format=TJPF_RGB))
+        except Exception:
+            # CMYK and other JPEGs libturbojpeg can't handle; let PIL try
+            pass
+    return Image.open(user_cover_path)
+
+def load_book_assets(originals_dir, mask_path):
+    """
+    Decode every book template and the cover mask once, for reuse across covers.
+    Returns (templates, mask) where templates maps template name to an RGBA image.
+    """
+    templates = {
+        name: Image.open(os.path.join(originals_dir, name)).convert("RGBA")
+        for name in TEMPLATE_COLORS
+    }
+    mask = Image.open(mask_path).convert("L")
+    template_size = next(iter(templates.values())).size
+    if mask.size != template_size:
+        mask = mask.resize(template_size, Image.LANCZOS)
+    return templates, mask
+
+def apply_cover_to_book(book_template_path, user_cover_path, mask_path, output_path, originals_dir=None,
+                        templates=None, mask_image=None, precomputed_template=None):
     """
     Applies a user-provided book cover onto the book template.
-    Uses manual perspective mapping and color-matched book templates.
+    Uses a perspective transform and color-matched book templates.
+    Pass templates and mask_image from load_book_assets to skip decoding them.
+    output_path may also be a writable binary file object such as io.BytesIO.
+    precomputed_template skips color matching with an already known template name.
+    Returns the name of the template used, or None if color matching was skipped
+    or the cover could not be processed.
     """
     try:
         # 1. Load the cover image first to analyze its color
-        user_cover = Image.open(user_cover_path)
+        user_cover = _open_cover(user_cover_path)
         
-        # Handle transparency issues - ensure cover has solid colors
+        # Handle transparency issues - flatten onto white in a single pass;
+        # the rest of the pipeline works in RGB, the mask handles compositing
         if user_cover.mode == 'RGBA':
-            # If image has alpha channel, composite it with white background
-            white_bg = Image.new('RGB', user_cover.size, (255, 255, 255))
-            user_cover = Image.alpha_composite(white_bg.convert('RGBA'), user_cover)
-        
-        # Convert to RGBA for processing
-        user_cover = user_cover.convert("RGBA")
+            pixels = np.asarray(user_cover, dtype=np.float32)
+            alpha = pixels[..., 3:4] / 255.0
+            flattened = pixels[..., :3] * alpha + 255.0 * (1.0 - alpha)
+            user_cover = Image.fromarray((flattened + 0.5).astype(np.uint8))
+        else:
+            user_cover = user_cover.convert("RGB")
         
         # 2. Extract dominant color and find matching book template
-        if originals_dir and os.path.exists(originals_dir):
+        template_name = None
+        if precomputed_template is not None:
+            template_name = precomputed_template
+            book_template_path = os.path.join(originals_dir or "", template_name)
+            print(f"Cached book template: {template_name}")
+        elif templates is not None or (originals_dir and os.path.exists(originals_dir)):
             dominant_color = get_dominant_color(user_cover)
-            book_template_path, template_name = find_closest_book_template(dominant_color, originals_dir)
+            book_template_path, template_name = find_closest_book_template(dominant_color, originals_dir or "")
             print(f"Dominant color: RGB{dominant_color}")
             print(f"Selected book template: {template_name}")
         
-        # 3. Load the selected book template and mask
-        book_template = Image.open(book_template_path).convert("RGBA")
-        cover_mask = Image.open(mask_path).convert("L")
+        # 3. Load the selected book template and mask, unless already decoded
+        if templates is not None and template_name in templates:
+            book_template = templates[template_name]
+        else:
+            book_template = Image.open(book_template_path).convert("RGBA")
+        if mask_image is not None:
+            cover_mask = mask_image
+        else:
+            cover_mask = Image.open(mask_path).convert("L")
 
         # 4. Get dimensions
         cover_width, cover_height = user_cover.size
@@ -110,103 +178,51 @@ def apply_cover_to_book(book_template_path, user_cover_path, mask_path, output_p
         
         print(f"Using quadrilateral: {quad_points}")
 
-        # 6. Manual approach: Create the transformation step by step
-        def map_point_to_quad(x_ratio, y_ratio, quad):
-            """
-            Map a point from unit square [0,1] x [0,1] to the quadrilateral
-            x_ratio, y_ratio are between 0 and 1
-            Expanded slightly to eliminate border gaps
-            """
-            tl, tr, br, bl = quad
-            
-            # Expand the mapping slightly beyond the quad boundaries
-            # This helps eliminate transparent borders
-            expand_factor = 0.02  # Expand by 2% on each side
-            
-            # Adjust ratios to map from expanded area
-            expanded_x = (x_ratio - expand_factor) / (1 - 2 * expand_factor)
-            expanded_y = (y_ratio - expand_factor) / (1 - 2 * expand_factor)
-            
-            # Clamp to valid range
-            expanded_x = max(0, min(1, expanded_x))
-            expanded_y = max(0, min(1, expanded_y))
-            
-            # Bilinear interpolation with expanded coordinates
-            # First interpolate along top and bottom edges
-            top_x = tl[0] + expanded_x * (tr[0] - tl[0])
-            top_y = tl[1] + expanded_x * (tr[1] - tl[1])
-            
-            # Bottom edge should use the same parameter for interpolation
-            # Using expanded_x here to match how we're interpolating along the top edge
-            # This ensures both top and bottom edges are interpolated consistently
-            bottom_x = bl[0] + expanded_x * (br[0] - bl[0])
-            bottom_y = bl[1] + expanded_x * (br[1] - bl[1])
-            
-            # Then interpolate between top and bottom
-            # This is where vertical interpolation occurs
-            # For each horizontal position, we interpolate vertically between
-            # the top and bottom edges
-            final_x = top_x + expanded_y * (bottom_x - top_x)
-            final_y = top_y + expanded_y * (bottom_y - top_y)
-            
-            return (int(final_x), int(final_y))
-
-        # 7. Create the transformed image
-        transformed_cover = Image.new('RGBA', book_template.size, (0, 0, 0, 0))
-        cover_pixels = user_cover.load()
-        transformed_pixels = transformed_cover.load()
-        
-        print("Starting manual transformation...")
-        
-        # Sample the cover image and map to quadrilateral
-        # Use higher density for better quality and coverage
-        sample_density = 1  # Sample every pixel for best quality
-        
-        for src_y in range(0, cover_height, sample_density):
-            for src_x in range(0, cover_width, sample_density):
-                # Calculate ratios (0 to 1)
-                x_ratio = src_x / cover_width
-                y_ratio = src_y / cover_height
-                
-                # Map to destination quadrilateral
-                dest_x, dest_y = map_point_to_quad(x_ratio, y_ratio, quad_points)
-                
-                # Check bounds
-                if 0 <= dest_x < template_width and 0 <= dest_y < template_height:
-                    # Get source pixel and ensure it's opaque
-                    src_pixel = cover_pixels[src_x, src_y]
-                    
-                    # Ensure pixel is fully opaque (no transparency)
-                    if len(src_pixel) == 4:  # RGBA
-                        src_pixel = (src_pixel[0], src_pixel[1], src_pixel[2], 255)
-                    
-                    # Fill a larger area around the destination point for better coverage
-                    fill_radius = max(1, sample_density)
-                    for dy in range(-fill_radius, fill_radius + 1):
-                        for dx in range(-fill_radius, fill_radius + 1):
-                            final_x = dest_x + dx
-                            final_y = dest_y + dy
-                            if 0 <= final_x < template_width and 0 <= final_y < template_height:
-                                transformed_pixels[final_x, final_y] = src_pixel
-        
-        print("Manual transformation complete!")
+        # Downsample large covers to twice the quad's extent before warping, so
+        # the resampler reads fewer source pixels while keeping quality headroom
+        quad_width = max(math.dist(tl, tr), math.dist(bl, br))
+        quad_height = max(math.dist(tl, bl), math.dist(tr, br))
+        if cover_width > 2 * quad_width or cover_height > 2 * quad_height:
+            cover_width = min(cover_width, int(2 * quad_width))
+            cover_height = min(cover_height, int(2 * quad_height))
+            user_cover = user_cover.resize((cover_width, cover_height), Image.LANCZOS)
+            print(f"Pre-resized cover to: {cover_width} x {cover_height}")
 
-        # 8. Apply smoothing to reduce pixelation
-        # Resize up and down to smooth the result
-        temp_size = (template_width * 2, template_height * 2)
-        smoothed = transformed_cover.resize(temp_size, Image.LANCZOS)
-        transformed_cover = smoothed.resize((template_width, template_height), Image.LANCZOS)
+        # 6. Warp the cover onto the quadrilateral in one perspective transform
+        # The outer 2% of the cover is cropped so the warped image slightly
+        # overflows the quad, which eliminates transparent borders
+        expand_factor = 0.02
+        inset_x = cover_width * expand_factor
+        inset_y = cover_height * expand_factor
+        cover_corners = [
+            (inset_x, inset_y),
+            (cover_width - inset_x, inset_y),
+            (cover_width - inset_x, cover_height - inset_y),
+            (inset_x, cover_height - inset_y)
+        ]
 
-        # 9. Apply the mask and create final result
+        # Only pixels under the mask are kept, so warp just the mask's bounding
+        # box instead of the whole template
         if cover_mask.size != book_template.size:
             cover_mask = cover_mask.resize(book_template.size, Image.LANCZOS)
+        region = cover_mask.getbbox() or (0, 0, template_width, template_height)
+        left, top, right, bottom = region
+        region_quad = [(x - left, y - top) for x, y in quad_points]
+
+        coeffs = _perspective_coeffs(cover_corners, region_quad)
+        transformed_cover = user_cover.transform(
+            (right - left, bottom - top), Image.PERSPECTIVE, coeffs, Image.BICUBIC
+        )
 
+        # 7. Apply the mask and create final result
         result = book_template.copy()
-        result.paste(transformed_cover, (0, 0), cover_mask)
+        result.paste(transformed_cover, (left, top), cover_mask.crop(region))
 
-        # 10. Save the final result
-        result.save(output_path)
+        # 8. Save the final result; generated books are cache artifacts, so
+        # favour fast zlib level 1 over a smaller file
+        result.save(output_path, format='PNG', compress_level=1, optimize=False)
         print(f"Book cover successfully applied and saved to: {output_path}")
+        return template_name
 
     except Exception as e:
         print(f"Error: {e}")
@@ -2,12 +2,14 @@
 Pytest configuration and fixtures.
 """
 
-import asyncio
-from typing import AsyncGenerator, Generator
+import uuid
+from typing import Any, AsyncGenerator, Awaitable, Callable, Generator
 
 import pytest
 import pytest_asyncio
+import uvloop
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
@@ -15,6 +17,7 @@ from sqlalchemy.pool import StaticPool
 from app.core.config import settings
 from app.db.database import Base, get_db
 from app.main import app
+from app.models.user import User
 
 # Test database URL (use SQLite for testing)
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
@@ -25,22 +28,67 @@ engine = create_async_engine(
     poolclass=StaticPool,
 )
 
+
+# pysqlite defers BEGIN on its own, which breaks SAVEPOINTs: a commit made by
+# the code under test would persist past the per-test rollback. Let
+# SQLAlchemy emit BEGIN itself instead.
+@event.listens_for(engine.sync_engine, "connect")
+def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(engine.sync_engine, "begin")
+def _emit_begin(connection):
+    connection.exec_driver_sql("BEGIN")
+
+
 TestingSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
 
-@pytest_asyncio.fixture
-async def db_session() -> AsyncGenerator[AsyncSession, None]:
-    """Create a test database session."""
+@pytest_asyncio.fixture(scope="session", autouse=True)
+async def create_schema() -> AsyncGenerator[None, None]:
+    """Create the test schema once for the whole session."""
     async with engine.begin() as connection:
         await connection.run_sync(Base.metadata.create_all)
     
-    async with TestingSessionLocal() as session:
-        yield session
+    yield
     
     async with engine.begin() as connection:
         await connection.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Create a test database session inside a transaction that is rolled back
+    after the test; commits made by the code under test only release a SAVEPOINT.
+    """
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = TestingSessionLocal(
+            bind=connection, join_transaction_mode="create_savepoint"
+        )
+        
+        yield session
+        
+        await session.close()
+        await transaction.rollback()
+
+
+@pytest.fixture
+def make_user(db_session: AsyncSession) -> Callable[..., Awaitable[User]]:
+    """Factory that adds a user (provider defaults to google) to the test session."""
+    async def _make_user(username: str, **fields: Any) -> User:
+        fields.setdefault("provider", "google")
+        user = User(id=uuid.uuid4(), username=username, **fields)
+        db_session.add(user)
+        await db_session.flush()
+        return user
+    
+    return _make_user
 
 
 @pytest.fixture
@@ -59,8 +107,6 @@ def client(db_session: AsyncSession) -> Generator[TestClient, None, None]:
 
 
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close() 
\ No newline at end of file
+def event_loop_policy() -> uvloop.EventLoopPolicy:
+    """Run async fixtures and tests on uvloop, matching production."""
+    return uvloop.EventLoopPolicy()
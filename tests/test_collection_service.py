@@ -0,0 +1,99 @@
+"""
+Tests for collection ownership checks on update.
+"""
+
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.collection import Collection, collection_ebooks
+from app.models.ebook import Ebook
+from app.models.user import User
+from app.repositories.collection import collection_repository
+from app.schemas.collection import CollectionUpdate
+from app.services.collection_service import collection_service
+
+
+async def _add_collection(db: AsyncSession, author: User) -> Collection:
+    collection = Collection(name="Favourites", author_id=author.id)
+    db.add(collection)
+    await db.flush()
+    return collection
+
+
+async def test_update_owned_updates_own_collection(db_session: AsyncSession, make_user):
+    owner = await make_user("owner")
+    collection = await _add_collection(db_session, owner)
+
+    updated = await collection_repository.update_owned(
+        db_session, id=collection.id, author_id=owner.id,
+        obj_in=CollectionUpdate(name="Renamed"),
+    )
+
+    assert updated is not None
+    assert updated.name == "Renamed"
+
+
+async def test_update_owned_returns_none_for_other_author(db_session: AsyncSession, make_user):
+    owner = await make_user("owner")
+    other = await make_user("other")
+    collection = await _add_collection(db_session, owner)
+
+    updated = await collection_repository.update_owned(
+        db_session, id=collection.id, author_id=other.id,
+        obj_in=CollectionUpdate(name="Hijacked"),
+    )
+
+    assert updated is None
+    await db_session.refresh(collection)
+    assert collection.name == "Favourites"
+
+
+async def test_update_collection_missing_is_404(db_session: AsyncSession, make_user):
+    user = await make_user("owner")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await collection_service.update_collection(
+            db_session, uuid.uuid4(), CollectionUpdate(name="Renamed"), user
+        )
+
+    assert exc_info.value.status_code == 404
+
+
+async def test_update_collection_not_owned_is_403(db_session: AsyncSession, make_user):
+    owner = await make_user("owner")
+    other = await make_user("other")
+    collection = await _add_collection(db_session, owner)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await collection_service.update_collection(
+            db_session, collection.id, CollectionUpdate(name="Hijacked"), other
+        )
+
+    assert exc_info.value.status_code == 403
+
+
+async def test_ebook_count_follows_collection_ebooks(db_session: AsyncSession, make_user):
+    owner = await make_user("owner")
+    collection = await _add_collection(db_session, owner)
+    ebook = Ebook(title="Dune", author_id=owner.id)
+    db_session.add(ebook)
+    await db_session.flush()
+
+    await db_session.execute(
+        insert(collection_ebooks).values(collection_id=collection.id, ebook_id=ebook.id)
+    )
+    await db_session.refresh(collection)
+    assert collection.ebook_count == 1
+
+    await db_session.execute(
+        delete(collection_ebooks).where(
+            collection_ebooks.c.collection_id == collection.id,
+            collection_ebooks.c.ebook_id == ebook.id,
+        )
+    )
+    await db_session.refresh(collection)
+    assert collection.ebook_count == 0
@@ -0,0 +1,30 @@
+"""
+Tests for ebook listing and pagination.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ebook import Ebook, PrivacyStatus
+from app.services.ebook_service import ebook_service
+
+
+async def test_get_ebooks_by_author_counts_only_their_public_ebooks(
+    db_session: AsyncSession, make_user
+):
+    author = await make_user("author")
+    other = await make_user("other")
+    for title in ("One", "Two", "Three"):
+        db_session.add(Ebook(title=title, author_id=author.id, status=PrivacyStatus.PUBLIC))
+    db_session.add(Ebook(title="Draft", author_id=author.id, status=PrivacyStatus.PRIVATE))
+    for title in ("Four", "Five"):
+        db_session.add(Ebook(title=title, author_id=other.id, status=PrivacyStatus.PUBLIC))
+    await db_session.flush()
+
+    result = await ebook_service.get_ebooks(
+        db_session, skip=0, limit=2, author_id=author.id, current_user=other
+    )
+
+    assert result.total == 3
+    assert result.pages == 2
+    assert len(result.items) == 2
+    assert {item.author.id for item in result.items} == {author.id}
@@ -0,0 +1,129 @@
+"""
+Tests for the book cover mask helpers.
+"""
+
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "mask"))
+
+import mask_algo  # noqa: E402
+from mask_algo import _open_cover, _perspective_coeffs, get_dominant_color  # noqa: E402
+
+
+def _apply_coeffs(coeffs, x, y):
+    """Map an output point back to the input the way PIL's PERSPECTIVE transform does."""
+    a, b, c, d, e, f, g, h = coeffs
+    w = g * x + h * y + 1
+    return (a * x + b * y + c) / w, (d * x + e * y + f) / w
+
+
+def test_perspective_coeffs_map_quad_corners_to_cover_corners():
+    cover = [(0, 0), (100, 0), (100, 150), (0, 150)]
+    quad = [(614, 374), (1200, 286), (1200, 1860), (614, 1730)]
+
+    coeffs = _perspective_coeffs(cover, quad)
+
+    assert len(coeffs) == 8
+    for (x, y), expected in zip(quad, cover):
+        assert _apply_coeffs(coeffs, x, y) == pytest.approx(expected, abs=1e-6)
+
+
+def test_perspective_coeffs_identity():
+    square = [(0, 0), (10, 0), (10, 10), (0, 10)]
+
+    coeffs = _perspective_coeffs(square, square)
+
+    assert coeffs == pytest.approx([1, 0, 0, 0, 1, 0, 0, 0], abs=1e-9)
+
+
+def test_perspective_transform_places_cover_inside_quad():
+    # Left half red, right half blue, warped into a smaller square
+    cover = Image.new("RGB", (40, 40), (255, 0, 0))
+    cover.paste((0, 0, 255), (20, 0, 40, 40))
+    quad = [(10, 10), (50, 10), (50, 50), (10, 50)]
+
+    coeffs = _perspective_coeffs([(0, 0), (40, 0), (40, 40), (0, 40)], quad)
+    warped = cover.transform((60, 60), Image.PERSPECTIVE, coeffs, Image.BICUBIC)
+
+    assert warped.getpixel((20, 30)) == (255, 0, 0)
+    assert warped.getpixel((40, 30)) == (0, 0, 255)
+    assert warped.getpixel((5, 5)) == (0, 0, 0)  # outside the cover
+
+
+def _stripes(colors_and_rows):
+    """Build a 50x50 image from (color, row_count) horizontal stripes."""
+    image = Image.new("RGB", (50, 50))
+    top = 0
+    for color, rows in colors_and_rows:
+        image.paste(color, (0, top, 50, top + rows))
+        top += rows
+    return image
+
+
+def test_dominant_color_returns_bucket_center():
+    image = _stripes([((180, 60, 60), 50)])
+
+    # 180 >> 3 = 22 -> 22 << 3 | 4 = 180; 60 >> 3 = 7 -> 60
+    assert get_dominant_color(image) == (180, 60, 60)
+
+
+def test_dominant_color_groups_near_shades():
+    # Three near-identical blues (30% each) beat one exact green (10%)
+    image = _stripes([
+        ((40, 80, 200), 15),
+        ((41, 81, 201), 15),
+        ((42, 82, 202), 15),
+        ((0, 160, 0), 5),
+    ])
+
+    assert get_dominant_color(image) == (44, 84, 204)
+
+
+def test_dominant_color_near_shades_beat_larger_exact_color():
+    # Exact-color counting would pick green (40%); the quantized blues total 60%
+    image = _stripes([
+        ((40, 80, 200), 20),
+        ((43, 83, 203), 10),
+        ((0, 160, 0), 20),
+    ])
+
+    assert get_dominant_color(image) == (44, 84, 204)
+
+
+def test_dominant_color_ignores_light_background():
+    image = _stripes([((250, 250, 250), 40), ((30, 30, 30), 10)])
+
+    assert get_dominant_color(image) == (28, 28, 28)
+
+
+def test_dominant_color_all_light_falls_back_to_all_pixels():
+    image = _stripes([((250, 250, 250), 50)])
+
+    assert get_dominant_color(image) == (252, 252, 252)
+
+
+def test_dominant_color_accepts_rgba_and_resizes():
+    image = Image.new("RGBA", (300, 200), (60, 120, 60, 255))
+
+    assert get_dominant_color(image) == (60, 124, 60)
+
+
+class _FailingTurboJPEG:
+    def decode(self, data, pixel_format=None):
+        raise OSError("Unsupported color conversion request")
+
+
+def test_open_cover_falls_back_to_pil_when_turbojpeg_fails(tmp_path, monkeypatch):
+    cover_path = tmp_path / "cover.jpg"
+    Image.new("CMYK", (8, 8), (0, 255, 255, 0)).save(cover_path, "JPEG")
+    monkeypatch.setattr(mask_algo, "_TJ", _FailingTurboJPEG())
+    monkeypatch.setattr(mask_algo, "TJPF_RGB", 0, raising=False)
+
+    cover = _open_cover(str(cover_path))
+
+    assert cover.mode == "CMYK"
+    assert cover.size == (8, 8)
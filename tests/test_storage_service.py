@@ -0,0 +1,64 @@
+"""
+Tests for storage upload validation.
+"""
+
+import io
+
+import httpx
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.services import storage_service as storage_module
+from app.services.storage_service import storage_service
+
+
+@pytest.fixture
+def received(monkeypatch) -> list:
+    """Route storage requests to a mock transport that records uploaded bodies."""
+    bodies = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(await request.aread())
+        return httpx.Response(200, json={"Key": request.url.path})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(storage_module, "get_async_client", lambda: client)
+    return bodies
+
+
+def test_validate_file_size_rejects_oversize_with_413():
+    file = UploadFile(io.BytesIO(b""), filename="book.epub", size=6 * 1024 * 1024)
+
+    with pytest.raises(HTTPException) as exc_info:
+        storage_service.validate_file_size(file, max_size_mb=5)
+
+    assert exc_info.value.status_code == 413
+
+
+def test_validate_file_size_accepts_within_limit():
+    file = UploadFile(io.BytesIO(b""), filename="book.epub", size=5 * 1024 * 1024)
+
+    storage_service.validate_file_size(file, max_size_mb=5)
+
+
+async def test_stream_upload_rejects_oversize_body_with_413(received):
+    # No declared size, so only the streaming check can catch it
+    file = UploadFile(io.BytesIO(b"x" * (1024 * 1024 + 1)), filename="book.epub")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await storage_service._stream_upload("ebooks", "book.epub", file, max_size_mb=1)
+
+    assert exc_info.value.status_code == 413
+
+
+async def test_stream_upload_reports_uploaded_size(received):
+    body = b"x" * (3 * storage_module.UPLOAD_CHUNK_SIZE + 7)
+    file = UploadFile(io.BytesIO(body), filename="book.epub")
+
+    response, file_size = await storage_service._stream_upload(
+        "ebooks", "book.epub", file, max_size_mb=1
+    )
+
+    assert response.status_code == 200
+    assert file_size == len(body)
+    assert received == [body]
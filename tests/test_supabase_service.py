@@ -0,0 +1,88 @@
+"""
+Tests for Supabase token claim decoding and verification.
+"""
+
+import base64
+import json
+import time
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.services.supabase_service import (
+    EXPECTED_AUDIENCE,
+    EXPECTED_ISSUER,
+    _decode_claims,
+    verify_supabase_token,
+)
+
+
+def _make_token(**claims) -> str:
+    payload = {
+        "sub": "8f14e45f-ceea-467f-a8f1-5b1a3c2d4e6f",
+        "iss": EXPECTED_ISSUER,
+        "aud": EXPECTED_AUDIENCE,
+        "exp": int(time.time()) + 3600,
+        **claims,
+    }
+    return jwt.encode(payload, "test-secret", algorithm="HS256")
+
+
+def test_decode_claims_returns_payload():
+    claims = _decode_claims(_make_token(email="reader@example.com"))
+
+    assert claims["email"] == "reader@example.com"
+    assert claims["aud"] == EXPECTED_AUDIENCE
+
+
+def test_decode_claims_rejects_expired_token():
+    with pytest.raises(jwt.ExpiredSignatureError):
+        _decode_claims(_make_token(exp=int(time.time()) - 10))
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "not-a-jwt",
+        "header.!!!not-base64!!!.signature",
+        "header." + base64.urlsafe_b64encode(b"{not json").decode().rstrip("=") + ".sig",
+        "header." + base64.urlsafe_b64encode(json.dumps([1, 2]).encode()).decode().rstrip("=") + ".sig",
+    ],
+)
+def test_decode_claims_rejects_malformed_token(token):
+    with pytest.raises(jwt.DecodeError):
+        _decode_claims(token)
+
+
+def test_decode_claims_rejects_non_numeric_exp():
+    with pytest.raises(jwt.DecodeError):
+        _decode_claims(_make_token(exp="tomorrow"))
+
+
+async def test_verify_accepts_audience_list():
+    token = _make_token(aud=["other", EXPECTED_AUDIENCE])
+
+    claims = await verify_supabase_token(token)
+
+    assert EXPECTED_AUDIENCE in claims["aud"]
+
+
+async def test_verify_rejects_audience_list_without_expected():
+    token = _make_token(aud=["other", "another"])
+
+    with pytest.raises(HTTPException) as exc_info:
+        await verify_supabase_token(token)
+
+    assert exc_info.value.status_code == 401
+    assert exc_info.value.detail == "Invalid token audience"
+
+
+async def test_verify_rejects_expired_token():
+    token = _make_token(exp=int(time.time()) - 10)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await verify_supabase_token(token)
+
+    assert exc_info.value.status_code == 401
+    assert exc_info.value.detail == "Token has expired"
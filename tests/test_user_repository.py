@@ -0,0 +1,51 @@
+"""
+Tests for user repository lookups.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories.user import user_repository
+
+
+async def test_get_by_email_or_username_ignores_missing_email(db_session: AsyncSession, make_user):
+    """A None email must not match users who have no email."""
+    await make_user("bob")
+
+    matches = await user_repository.get_by_email_or_username(
+        db_session, email=None, username="fresh_name"
+    )
+
+    assert matches == {"by_email": None, "by_username": None}
+
+
+async def test_get_by_email_or_username_matches_both(db_session: AsyncSession, make_user):
+    """Email and username matches come back from one lookup."""
+    by_email = await make_user("alice", email="alice@example.com")
+    by_username = await make_user("carol")
+
+    matches = await user_repository.get_by_email_or_username(
+        db_session, email="alice@example.com", username="carol"
+    )
+
+    assert matches["by_email"] is by_email
+    assert matches["by_username"] is by_username
+
+
+async def test_get_usernames_with_prefix_escapes_underscore(db_session: AsyncSession, make_user):
+    """`_` in the prefix is literal, not a single-character wildcard."""
+    for username in ("a_b", "a_b_1", "axb_1", "a_bx", "a_b1"):
+        await make_user(username)
+
+    usernames = await user_repository.get_usernames_with_prefix(db_session, "a_b")
+
+    assert sorted(usernames) == ["a_b", "a_b_1"]
+
+
+async def test_get_usernames_with_prefix_escapes_percent(db_session: AsyncSession, make_user):
+    """`%` in the prefix is literal, not a multi-character wildcard."""
+    for username in ("100%", "100%_2", "100x_2", "1000_2"):
+        await make_user(username)
+
+    usernames = await user_repository.get_usernames_with_prefix(db_session, "100%")
+
+    assert sorted(usernames) == ["100%", "100%_2"]
@@ -0,0 +1,32 @@
+"""
+Tests for user service helpers.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.user_service import _generate_unique_username
+
+
+async def test_generate_unique_username_free_base(db_session: AsyncSession, make_user):
+    await make_user("reader_1")
+
+    assert await _generate_unique_username(db_session, "Reader") == "reader"
+
+
+async def test_generate_unique_username_fills_first_gap(db_session: AsyncSession, make_user):
+    for username in ("reader", "reader_1", "reader_3", "reader_x"):
+        await make_user(username)
+
+    assert await _generate_unique_username(db_session, "reader") == "reader_2"
+
+
+async def test_generate_unique_username_after_last_suffix(db_session: AsyncSession, make_user):
+    for username in ("reader", "reader_1", "reader_2"):
+        await make_user(username)
+
+    assert await _generate_unique_username(db_session, "reader") == "reader_3"
+
+
+async def test_generate_unique_username_strips_invalid_characters(db_session: AsyncSession, make_user):
+    assert await _generate_unique_username(db_session, "Jane Doe!") == "jane_doe"
+    assert await _generate_unique_username(db_session, "!!!") == "user"